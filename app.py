@@ -1,11 +1,15 @@
 ﻿from __future__ import annotations
 
+import asyncio
 import base64
-import glob
-import json
+import bisect
+import errno
+import functools
 import os
 import shutil
 import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from uuid import uuid4
 from dataclasses import dataclass
 from pathlib import Path
@@ -13,8 +17,10 @@ from typing import Any
 
 from fastapi import FastAPI, File, Form, HTTPException, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse
 from fastapi.staticfiles import StaticFiles
+import numpy as np
+import orjson
 from pydantic import BaseModel
 from PIL import Image
 
@@ -26,27 +32,86 @@ except Exception:
 
 
 ALLOWED_EXTS = (".jpg", ".jpeg", ".png")
+_EXT_SET = frozenset(e.lstrip(".") for e in ALLOWED_EXTS)
+
+
+def is_image_name(name: str) -> bool:
+    i = name.rfind(".")
+    return i >= 0 and name[i + 1:].lower() in _EXT_SET
+
+
+def iter_images(path: str):
+    """Yield image paths in directory order; for internal consumers that
+    only iterate, skipping the sort list_images pays for API responses."""
+    try:
+        with os.scandir(path) as it:
+            for e in it:
+                if e.is_file(follow_symlinks=False) and is_image_name(e.name):
+                    yield e.path.replace("\\", "/")
+    except OSError:
+        return
 
 
 def list_images(path: str) -> list[str]:
-    return sorted(
-        f for f in glob.glob(f"{path}/*.*") if f.lower().endswith(ALLOWED_EXTS)
-    )
+    return sorted(iter_images(path))
 
 
+# Safe to memoize: abspath only depends on cwd, which never changes in
+# this server process.
+@functools.lru_cache(maxsize=8192)
 def norm(path: str) -> str:
     return os.path.abspath(path).replace("\\", "/")
 
 
+def move_file(src: str, dst: str) -> None:
+    # Within a project root src/dst share a filesystem, so a plain
+    # rename(2) suffices; fall back to shutil.move only across devices.
+    try:
+        os.replace(src, dst)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(src, dst)
+
+
+# path -> (mtime_ns, size, w, h); a plain dict (not lru_cache) so other
+# code paths that already decoded the image can seed it directly.
+_img_wh_cache: dict[str, tuple[int, int, int, int]] = {}
+_IMG_WH_CACHE_MAX = 4096
+
+
+def _store_img_wh(path: str, st: os.stat_result, w: int, h: int) -> None:
+    if len(_img_wh_cache) >= _IMG_WH_CACHE_MAX:
+        _img_wh_cache.clear()
+    _img_wh_cache[path] = (st.st_mtime_ns, st.st_size, w, h)
+
+
+def img_wh(path: str) -> tuple[int, int]:
+    st = os.stat(path)
+    hit = _img_wh_cache.get(path)
+    if hit is not None and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+        return hit[2], hit[3]
+    with Image.open(path) as im:
+        w, h = im.width, im.height
+    _store_img_wh(path, st, w, h)
+    return w, h
+
+
 def yolo_root(path: str) -> str | None:
     p = norm(path).rstrip("/")
 
     def ok(c: str) -> bool:
-        return any(os.path.isdir(f"{c}/images/{s}") for s in ("train", "val", "test"))
-
-    cands = [p, norm(os.path.dirname(p)), norm(os.path.dirname(os.path.dirname(p)))]
+        try:
+            with os.scandir(f"{c}/images") as it:
+                return any(e.is_dir() and e.name in ("train", "val", "test") for e in it)
+        except OSError:
+            return False
+
+    cands = list(dict.fromkeys(
+        c for c in (p, norm(os.path.dirname(p)), norm(os.path.dirname(os.path.dirname(p)))) if c
+    ))
     for c in cands:
-        if c and ok(c):
+        if ok(c):
             return c
     try:
         for child in os.listdir(p):
@@ -64,23 +129,46 @@ def ensure_labels(root: str) -> None:
             os.makedirs(f"{root}/labels/{s}", exist_ok=True)
 
 
-def read_yolo_labels(label_path: str, w: int, h: int) -> list[list[float]]:
-    rects: list[list[float]] = []
-    if not os.path.isfile(label_path) or os.path.getsize(label_path) == 0:
-        return rects
+def _parse_yolo_lines(label_path: str) -> np.ndarray:
+    """Line-by-line fallback for label files np.loadtxt rejects;
+    skips malformed rows instead of failing the whole file."""
+    rows: list[list[float]] = []
     with open(label_path, "r", encoding="utf-8") as f:
         for line in f:
-            parts = line.strip().split()
+            parts = line.split()
             if len(parts) != 5:
                 continue
-            c, cx, cy, bw, bh = map(float, parts)
-            rects.append([
-                (cx - bw / 2) * w,
-                (cy - bh / 2) * h,
-                (cx + bw / 2) * w,
-                (cy + bh / 2) * h,
-                int(c),
-            ])
+            try:
+                rows.append([float(p) for p in parts])
+            except ValueError:
+                continue
+    return np.asarray(rows, dtype=np.float64).reshape(-1, 5)
+
+
+def read_yolo_labels(label_path: str, w: int, h: int) -> list[list[float]]:
+    if not os.path.isfile(label_path) or os.path.getsize(label_path) == 0:
+        return []
+    try:
+        arr = np.loadtxt(label_path, dtype=np.float64, ndmin=2)
+    except ValueError:
+        arr = _parse_yolo_lines(label_path)
+    if arr.size == 0 or arr.shape[1] != 5:
+        return []
+    cls = arr[:, 0].astype(np.int64)
+    cx, cy, bw, bh = arr[:, 1:].T
+    out = np.stack(
+        [
+            (cx - bw * 0.5) * w,
+            (cy - bh * 0.5) * h,
+            (cx + bw * 0.5) * w,
+            (cy + bh * 0.5) * h,
+            cls,
+        ],
+        axis=1,
+    )
+    rects = out.tolist()
+    for r in rects:
+        r[4] = int(r[4])
     return rects
 
 
@@ -90,15 +178,19 @@ def save_yolo_labels(label_path: str, rects: list[list[float]], w: int, h: int)
         if os.path.exists(label_path):
             os.remove(label_path)
         return
-    lines: list[str] = []
-    for x1, y1, x2, y2, cid in rects:
-        cx = ((x1 + x2) / 2) / w
-        cy = ((y1 + y2) / 2) / h
-        bw = (x2 - x1) / w
-        bh = (y2 - y1) / h
-        lines.append(f"{int(cid)} {cx:.6f} {cy:.6f} {bw:.6f} {bh:.6f}\n")
-    with open(label_path, "w", encoding="utf-8", newline="\n") as f:
-        f.write("".join(lines))
+    arr = np.asarray(rects, dtype=np.float64)
+    x1, y1, x2, y2, cls = arr.T
+    out = np.stack(
+        [
+            cls,
+            ((x1 + x2) * 0.5) / w,
+            ((y1 + y2) * 0.5) / h,
+            (x2 - x1) / w,
+            (y2 - y1) / h,
+        ],
+        axis=1,
+    )
+    np.savetxt(label_path, out, fmt="%d %.6f %.6f %.6f %.6f", newline="\n")
 
 
 @dataclass
@@ -107,15 +199,33 @@ class ProjectState:
     mode: str = "images"
     split: str = "train"
     images: list[str] = None
+    splits: list[str] = None
+    images_by_split: dict[str, list[str]] = None
+    img_dirs: dict[str, str] = None
+    lbl_dirs: dict[str, str] = None
+    rev: int = 0
 
     def __post_init__(self):
         if self.images is None:
             self.images = []
+        if self.splits is None:
+            self.splits = []
+        if self.images_by_split is None:
+            self.images_by_split = {}
+        if self.img_dirs is None:
+            self.img_dirs = {}
+        if self.lbl_dirs is None:
+            self.lbl_dirs = {}
+
+    def lbl_dir(self, split: str) -> str:
+        return self.lbl_dirs.get(split) or f"{self.root}/labels/{split}"
 
 
 class OpenProjectReq(BaseModel):
     path: str
     mode: str = "images"  # images | yolo | rfdetr
+    offset: int = 0
+    limit: int = 0  # 0 = no limit
 
 
 class SaveReq(BaseModel):
@@ -131,6 +241,14 @@ class DetectReq(BaseModel):
     cls: int = 0
 
 
+class DetectBatchReq(BaseModel):
+    image_paths: list[str]
+    model_path: str = ""
+    conf: float = 0.5
+    cls: int = 0
+    batch: int = 16
+
+
 class ExportReq(BaseModel):
     output_dir: str
     fmt: str  # YOLO (.txt) | JSON
@@ -155,7 +273,7 @@ STATIC_DIR = BASE_DIR / "static"
 UPLOAD_BASE = Path(tempfile.gettempdir()) / "ai_labeller_uploads"
 HEADLESS = os.environ.get("HEADLESS", "0") == "1" or os.environ.get("RENDER", "") == "true"
 
-app = FastAPI(title="AI Labeller Web")
+app = FastAPI(title="AI Labeller Web", default_response_class=ORJSONResponse)
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
 app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
 
@@ -163,6 +281,34 @@ state = ProjectState()
 model_cache: dict[str, Any] = {}
 model_library: list[str] = ["yolo26m.pt", "yolo26n.pt"]
 class_names: list[str] = ["class0", "class1", "class2"]
+_model_lock = threading.Lock()  # guards model_cache loads and model_library
+_names_lock = threading.Lock()  # guards class_names
+
+
+def _warm_model(model_id: str) -> None:
+    """Load a model and run a dummy inference so the first user-triggered
+    detect pays steady-state latency instead of cold-start."""
+    if not HAS_YOLO or model_id in model_cache:
+        return
+    try:
+        with _model_lock:
+            if model_id in model_cache:
+                return
+            m = YOLO(model_id)
+            m(np.zeros((640, 640, 3), dtype=np.uint8), verbose=False)
+            model_cache[model_id] = m
+    except Exception:
+        pass  # best-effort; /api/detect surfaces real load errors
+
+
+def _warm_model_async(model_id: str) -> None:
+    threading.Thread(target=_warm_model, args=(model_id,), daemon=True).start()
+
+
+@app.on_event("startup")
+def warm_default_model() -> None:
+    if model_library:
+        _warm_model_async(model_library[0])
 
 
 @app.get("/")
@@ -223,7 +369,7 @@ def pick_file(
 
 @app.get("/api/models")
 def get_models() -> dict[str, Any]:
-    return {"models": model_library}
+    return {"models": list(model_library)}
 
 
 @app.post("/api/models/import")
@@ -233,9 +379,12 @@ def import_model(payload: dict[str, str]) -> dict[str, Any]:
         raise HTTPException(status_code=400, detail="Model file not found")
     if not path.lower().endswith((".pt", ".onnx")):
         raise HTTPException(status_code=400, detail="Only .pt or .onnx model files are supported")
-    if path not in model_library:
-        model_library.append(path)
-    return {"ok": True, "models": model_library, "selected": path}
+    with _model_lock:
+        if path not in model_library:
+            model_library.append(path)
+        models = list(model_library)
+    _warm_model_async(path)
+    return {"ok": True, "models": models, "selected": path}
 
 
 @app.post("/api/models/upload")
@@ -251,12 +400,22 @@ async def upload_model(file: UploadFile = File(...)) -> dict[str, Any]:
     with open(dst, "wb") as wf:
         wf.write(await file.read())
     p = norm(str(dst))
-    if p not in model_library:
-        model_library.append(p)
-    return {"ok": True, "models": model_library, "selected": p}
+    with _model_lock:
+        if p not in model_library:
+            model_library.append(p)
+        models = list(model_library)
+    _warm_model_async(p)
+    return {"ok": True, "models": models, "selected": p}
+
+
+def _page(images: list[str], offset: int = 0, limit: int = 0) -> list[str]:
+    if offset <= 0 and limit <= 0:
+        return images
+    offset = max(offset, 0)
+    return images[offset:offset + limit] if limit > 0 else images[offset:]
 
 
-def _open_project_core(path: str, mode: str) -> dict[str, Any]:
+def _open_project_core(path: str, mode: str, offset: int = 0, limit: int = 0) -> dict[str, Any]:
     detected_root = yolo_root(path)
     if mode in ("yolo", "rfdetr") and detected_root:
         rootp = detected_root
@@ -269,6 +428,12 @@ def _open_project_core(path: str, mode: str) -> dict[str, Any]:
 
     state.root = rootp
     state.mode = mode
+    state.rev += 1
+
+    # Serve the project tree via StaticFiles (sendfile + Range support)
+    # instead of routing every image fetch through the get_image handler.
+    app.router.routes = [r for r in app.router.routes if getattr(r, "name", "") != "project_images"]
+    app.mount("/project_images", StaticFiles(directory=rootp), name="project_images")
 
     if os.path.isdir(f"{rootp}/images"):
         ensure_labels(rootp)
@@ -283,18 +448,28 @@ def _open_project_core(path: str, mode: str) -> dict[str, Any]:
             if "train" in non_empty
             else (non_empty[0] if non_empty else (next(iter(split_files)) if split_files else "train"))
         )
+        state.splits = list(split_files)
+        state.images_by_split = split_files
+        state.img_dirs = {s: f"{rootp}/images/{s}" for s in split_files}
+        state.lbl_dirs = {s: f"{rootp}/labels/{s}" for s in split_files}
         state.images = split_files.get(state.split, [])
     else:
         state.split = "train"
-        state.images = list_images(rootp)
+        state.splits = ["train"]
+        state.images_by_split = {"train": list_images(rootp)}
+        state.img_dirs = {"train": rootp}
+        state.lbl_dirs = {"train": f"{rootp}/labels/train"}
+        state.images = state.images_by_split["train"]
         os.makedirs(f"{rootp}/labels/train", exist_ok=True)
 
     return {
         "root": state.root,
         "mode": state.mode,
         "split": state.split,
-        "images": state.images,
+        "images": _page(state.images, offset, limit),
         "count": len(state.images),
+        "total": len(state.images),
+        "rev": state.rev,
         "class_names": class_names,
     }
 
@@ -304,7 +479,7 @@ def open_project(req: OpenProjectReq) -> dict[str, Any]:
     path = norm(req.path)
     if not os.path.isdir(path):
         raise HTTPException(status_code=400, detail="Folder not found")
-    return _open_project_core(path, req.mode)
+    return _open_project_core(path, req.mode, req.offset, req.limit)
 
 
 @app.post("/api/project/upload")
@@ -344,31 +519,43 @@ def change_split(payload: dict[str, str]) -> dict[str, Any]:
     if not state.root:
         raise HTTPException(status_code=400, detail="No project loaded")
     split = payload.get("split", "train")
-    if os.path.isdir(f"{state.root}/images/{split}"):
+    if split in state.images_by_split:
         state.split = split
-        state.images = list_images(f"{state.root}/images/{split}")
+        state.images = state.images_by_split[split]
     else:
         state.split = "train"
         state.images = []
-    return {"split": state.split, "images": state.images}
+    offset = int(payload.get("offset", 0) or 0)
+    limit = int(payload.get("limit", 0) or 0)
+    return {
+        "split": state.split,
+        "images": _page(state.images, offset, limit),
+        "total": len(state.images),
+        "rev": state.rev,
+    }
+
+
+@app.get("/api/project/images")
+def page_project_images(offset: int = 0, limit: int = 0, split: str = "") -> dict[str, Any]:
+    if not state.root:
+        raise HTTPException(status_code=400, detail="No project loaded")
+    images = state.images_by_split.get(split, state.images) if split else state.images
+    return {
+        "images": _page(images, offset, limit),
+        "total": len(images),
+        "rev": state.rev,
+    }
 
 
 @app.get("/api/project/info")
 def project_info() -> dict[str, Any]:
     if not state.root:
         raise HTTPException(status_code=400, detail="No project loaded")
-    splits = []
-    if os.path.isdir(f"{state.root}/images"):
-        for s in ("train", "val", "test"):
-            if os.path.isdir(f"{state.root}/images/{s}"):
-                splits.append(s)
-    else:
-        splits = ["train"]
     return {
         "root": state.root,
         "mode": state.mode,
         "split": state.split,
-        "splits": splits,
+        "splits": state.splits,
         "count": len(state.images),
         "class_names": class_names,
     }
@@ -389,10 +576,9 @@ def get_labels(image_path: str, split: str = "train") -> dict[str, Any]:
     img = norm(image_path)
     if not os.path.isfile(img):
         raise HTTPException(status_code=404, detail="Image missing")
-    with Image.open(img) as im:
-        w, h = im.width, im.height
+    w, h = img_wh(img)
     base = os.path.splitext(os.path.basename(img))[0]
-    lbl = f"{state.root}/labels/{split}/{base}.txt"
+    lbl = f"{state.lbl_dir(split)}/{base}.txt"
     rects = read_yolo_labels(lbl, w, h)
     return {
         "rects": rects,
@@ -409,17 +595,16 @@ def save_labels(req: SaveReq) -> dict[str, Any]:
     img = norm(req.image_path)
     if not os.path.isfile(img):
         raise HTTPException(status_code=404, detail="Image missing")
-    with Image.open(img) as im:
-        w, h = im.width, im.height
+    w, h = img_wh(img)
     base = os.path.splitext(os.path.basename(img))[0]
-    lbl = f"{state.root}/labels/{req.split}/{base}.txt"
+    lbl = f"{state.lbl_dir(req.split)}/{base}.txt"
     save_yolo_labels(lbl, req.rects, w, h)
     return {"ok": True}
 
 
 @app.get("/api/classes")
 def get_classes() -> dict[str, Any]:
-    return {"class_names": class_names}
+    return {"class_names": list(class_names)}
 
 
 @app.post("/api/classes")
@@ -428,8 +613,9 @@ def set_classes(req: ClassesReq) -> dict[str, Any]:
     names = [n.strip() for n in req.names if n.strip()]
     if not names:
         raise HTTPException(status_code=400, detail="Class names cannot be empty")
-    class_names = names
-    return {"ok": True, "class_names": class_names}
+    with _names_lock:
+        class_names = names
+    return {"ok": True, "class_names": names}
 
 
 @app.post("/api/remove")
@@ -448,16 +634,27 @@ def remove_image(req: RemoveReq) -> dict[str, Any]:
     os.makedirs(rem_img_dir, exist_ok=True)
     os.makedirs(rem_lbl_dir, exist_ok=True)
     dst_img = f"{rem_img_dir}/{filename}"
-    shutil.move(img, dst_img)
+    move_file(img, dst_img)
 
     for ext in (".txt", ".json"):
-        src_lbl = f"{state.root}/labels/{split}/{base}{ext}"
+        src_lbl = f"{state.lbl_dir(split)}/{base}{ext}"
         if os.path.isfile(src_lbl):
-            shutil.move(src_lbl, f"{rem_lbl_dir}/{base}{ext}")
-
-    if os.path.isdir(f"{state.root}/images/{split}"):
-        state.images = list_images(f"{state.root}/images/{split}")
-    return {"ok": True, "images": state.images, "removed": filename}
+            move_file(src_lbl, f"{rem_lbl_dir}/{base}{ext}")
+
+    imgs = state.images_by_split.get(split)
+    if imgs:
+        i = bisect.bisect_left(imgs, img)
+        if i < len(imgs) and imgs[i] == img:
+            imgs.pop(i)
+    state.rev += 1
+    return {
+        "ok": True,
+        "removed": filename,
+        "added_paths": [],
+        "removed_paths": [img],
+        "total": len(state.images),
+        "rev": state.rev,
+    }
 
 
 @app.get("/api/restore/list")
@@ -467,7 +664,7 @@ def restore_list(split: str = "train") -> dict[str, Any]:
     rem_img_dir = f"{state.root}/removed/{split}/images"
     if not os.path.isdir(rem_img_dir):
         return {"files": []}
-    files = sorted([f for f in os.listdir(rem_img_dir) if f.lower().endswith(ALLOWED_EXTS)])
+    files = sorted(f for f in os.listdir(rem_img_dir) if is_image_name(f))
     return {"files": files}
 
 
@@ -482,57 +679,122 @@ def restore_image(req: RestoreReq) -> dict[str, Any]:
     if not os.path.isfile(rem_img):
         raise HTTPException(status_code=404, detail="Removed file not found")
 
-    dst_img_dir = f"{state.root}/images/{split}"
-    dst_lbl_dir = f"{state.root}/labels/{split}"
+    dst_img_dir = state.img_dirs.get(split) or f"{state.root}/images/{split}"
+    dst_lbl_dir = state.lbl_dir(split)
     os.makedirs(dst_img_dir, exist_ok=True)
     os.makedirs(dst_lbl_dir, exist_ok=True)
-    shutil.move(rem_img, f"{dst_img_dir}/{filename}")
+    dst_img = f"{dst_img_dir}/{filename}"
+    move_file(rem_img, dst_img)
 
     for ext in (".txt", ".json"):
         rem_lbl = f"{state.root}/removed/{split}/labels/{base}{ext}"
         if os.path.isfile(rem_lbl):
-            shutil.move(rem_lbl, f"{dst_lbl_dir}/{base}{ext}")
+            move_file(rem_lbl, f"{dst_lbl_dir}/{base}{ext}")
 
-    if os.path.isdir(f"{state.root}/images/{split}"):
-        state.images = list_images(f"{state.root}/images/{split}")
-    return {"ok": True, "images": state.images, "restored": filename}
+    imgs = state.images_by_split.setdefault(split, [])
+    i = bisect.bisect_left(imgs, dst_img)
+    if i >= len(imgs) or imgs[i] != dst_img:
+        imgs.insert(i, dst_img)
+    state.rev += 1
+    return {
+        "ok": True,
+        "restored": filename,
+        "added_paths": [dst_img],
+        "removed_paths": [],
+        "total": len(state.images),
+        "rev": state.rev,
+    }
 
 
-@app.post("/api/detect")
-def detect(req: DetectReq) -> dict[str, Any]:
-    if not HAS_YOLO:
-        raise HTTPException(status_code=400, detail="ultralytics not installed")
-    img = norm(req.image_path)
-    raw_model = req.model_path.strip()
+def _resolve_model_id(raw_model: str) -> str:
     model_path = norm(raw_model) if raw_model else ""
-    if not os.path.isfile(img):
-        raise HTTPException(status_code=404, detail="Image not found")
-    model_id = model_path
     if model_path and os.path.isfile(model_path):
-        model_id = model_path
-    elif raw_model and ("/" not in raw_model and "\\" not in raw_model):
+        return model_path
+    if raw_model and ("/" not in raw_model and "\\" not in raw_model):
         # Allow model-name inference (e.g. yolo26m.pt) like desktop behavior.
-        model_id = raw_model
-    elif not raw_model:
-        model_id = model_library[0] if model_library else "yolo26m.pt"
-    else:
-        raise HTTPException(status_code=404, detail="Model not found")
+        return raw_model
+    if not raw_model:
+        return model_library[0] if model_library else "yolo26m.pt"
+    raise HTTPException(status_code=404, detail="Model not found")
 
+
+def _get_model(model_id: str) -> Any:
+    # Double-checked so two concurrent detects can't both load the same
+    # (multi-hundred MB) weights.
     model = model_cache.get(model_id)
     if model is None:
-        model = YOLO(model_id)
-        model_cache[model_id] = model
-
-    results = model(img, conf=req.conf, verbose=False)
+        with _model_lock:
+            model = model_cache.get(model_id)
+            if model is None:
+                model = YOLO(model_id)
+                model_cache[model_id] = model
+    return model
+
+
+def _run_detect(model: Any, img: str, conf: float, cls: int) -> list[list[float]]:
+    # Decode once here and share the result: the array goes straight to
+    # the model (skipping its internal re-read) and (w, h) seeds the
+    # size cache for the follow-up /api/labels calls.
+    st = os.stat(img)
+    with Image.open(img) as im:
+        if im.mode != "RGB":
+            im = im.convert("RGB")
+        w, h = im.width, im.height
+        arr = np.asarray(im)[:, :, ::-1]  # ultralytics expects BGR arrays
+    _store_img_wh(img, st, w, h)
+    results = model(arr, conf=conf, verbose=False)
     rects: list[list[float]] = []
     for r in results:
-        if r.boxes is None:
-            continue
-        for b in r.boxes.xyxy:
-            rects.append([b[0].item(), b[1].item(), b[2].item(), b[3].item(), req.cls])
+        rects.extend(_boxes_to_rects(r, cls))
+    return rects
+
+
+def _boxes_to_rects(result: Any, cls: int) -> list[list[float]]:
+    # One async memcpy device->host instead of per-element .item() syncs.
+    if result.boxes is None:
+        return []
+    xyxy = result.boxes.xyxy.detach().cpu().numpy()
+    if not xyxy.size:
+        return []
+    cls_col = np.full((xyxy.shape[0], 1), cls, dtype=xyxy.dtype)
+    return np.concatenate([xyxy, cls_col], axis=1).tolist()
+
+
+@app.post("/api/detect")
+async def detect(req: DetectReq) -> dict[str, Any]:
+    if not HAS_YOLO:
+        raise HTTPException(status_code=400, detail="ultralytics not installed")
+    img = norm(req.image_path)
+    if not os.path.isfile(img):
+        raise HTTPException(status_code=404, detail="Image not found")
+    model_id = _resolve_model_id(req.model_path.strip())
+    model = _get_model(model_id)
+    rects = await asyncio.to_thread(_run_detect, model, img, req.conf, req.cls)
     return {"rects": rects, "model": model_id}
 
 
+@app.post("/api/detect/batch")
+async def detect_batch(req: DetectBatchReq) -> dict[str, Any]:
+    if not HAS_YOLO:
+        raise HTTPException(status_code=400, detail="ultralytics not installed")
+    paths = [norm(p) for p in req.image_paths]
+    missing = [p for p in paths if not os.path.isfile(p)]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Image not found: {missing[0]}")
+    if not paths:
+        raise HTTPException(status_code=400, detail="No images given")
+    model_id = _resolve_model_id(req.model_path.strip())
+    model = _get_model(model_id)
+    batch = max(1, req.batch)
+    rects_by_path: dict[str, list[list[float]]] = {}
+    for i in range(0, len(paths), batch):
+        chunk = paths[i:i + batch]
+        results = await asyncio.to_thread(model, chunk, conf=req.conf, verbose=False)
+        for p, r in zip(chunk, results):
+            rects_by_path[p] = _boxes_to_rects(r, req.cls)
+    return {"rects_by_path": rects_by_path, "model": model_id}
+
+
 @app.post("/api/export")
 def export_all(req: ExportReq) -> dict[str, Any]:
     if not state.root:
@@ -545,51 +807,73 @@ def export_all(req: ExportReq) -> dict[str, Any]:
         for split in ("train", "val", "test"):
             if not os.path.isdir(f"{state.root}/images/{split}"):
                 continue
-            for img in list_images(f"{state.root}/images/{split}"):
+            for img in iter_images(f"{state.root}/images/{split}"):
                 base = os.path.splitext(os.path.basename(img))[0]
-                lbl = f"{state.root}/labels/{split}/{base}.txt"
+                lbl = f"{state.lbl_dir(split)}/{base}.txt"
                 entries.append((split, img, lbl))
     else:
-        for img in list_images(state.root):
+        for img in iter_images(state.root):
             base = os.path.splitext(os.path.basename(img))[0]
             lbl = f"{state.root}/labels/train/{base}.txt"
             entries.append(("train", img, lbl))
 
+    for split in {s for s, _, _ in entries}:
+        os.makedirs(f"{out_dir}/images/{split}", exist_ok=True)
+
+    def _copy_pair(entry: tuple[str, str, str]) -> None:
+        split, img, lbl = entry
+        shutil.copy2(img, f"{out_dir}/images/{split}/{os.path.basename(img)}")
+        if os.path.isfile(lbl):
+            shutil.copy2(lbl, f"{out_dir}/labels/{split}/{os.path.basename(lbl)}")
+
     if req.fmt == "YOLO (.txt)":
-        for split, img, lbl in entries:
-            os.makedirs(f"{out_dir}/images/{split}", exist_ok=True)
+        for split in {s for s, _, _ in entries}:
             os.makedirs(f"{out_dir}/labels/{split}", exist_ok=True)
-            shutil.copy2(img, f"{out_dir}/images/{split}/{os.path.basename(img)}")
-            if os.path.isfile(lbl):
-                shutil.copy2(lbl, f"{out_dir}/labels/{split}/{os.path.basename(lbl)}")
+        # Keep multiple copies in flight so the kernel can coalesce IO.
+        with ThreadPoolExecutor(max_workers=16) as ex:
+            list(ex.map(_copy_pair, entries))
     else:
-        by_split: dict[str, list[dict[str, Any]]] = {}
-        for split, img, lbl in entries:
-            os.makedirs(f"{out_dir}/images/{split}", exist_ok=True)
-            os.makedirs(f"{out_dir}/annotations", exist_ok=True)
-            shutil.copy2(img, f"{out_dir}/images/{split}/{os.path.basename(img)}")
-            with Image.open(img) as im:
-                w, h = im.width, im.height
-            rects = read_yolo_labels(lbl, w, h)
-            anns = []
-            for x1, y1, x2, y2, cid in rects:
-                cx = ((x1 + x2) / 2) / w
-                cy = ((y1 + y2) / 2) / h
-                bw = (x2 - x1) / w
-                bh = (y2 - y1) / h
-                anns.append({"class_id": int(cid), "bbox_xyxy": [x1, y1, x2, y2], "bbox_yolo": [cx, cy, bw, bh]})
-            item = {
-                "image": os.path.basename(img),
-                "split": split,
-                "width": w,
-                "height": h,
-                "annotations": anns,
-            }
-            by_split.setdefault(split, []).append(item)
-        for split, items in by_split.items():
-            out_json = f"{out_dir}/annotations/{split}.json"
-            with open(out_json, "w", encoding="utf-8") as f:
-                json.dump(items, f, ensure_ascii=False, indent=2)
+        os.makedirs(f"{out_dir}/annotations", exist_ok=True)
+        # Copy images in the pool while the annotation files stream on
+        # this thread; memory stays O(one image's annotations).
+        split_files: dict[str, Any] = {}
+        with ThreadPoolExecutor(max_workers=16) as ex:
+            copies = [
+                ex.submit(shutil.copy2, img, f"{out_dir}/images/{split}/{os.path.basename(img)}")
+                for split, img, _ in entries
+            ]
+            try:
+                for split, img, lbl in entries:
+                    w, h = img_wh(img)
+                    rects = read_yolo_labels(lbl, w, h)
+                    anns = []
+                    for x1, y1, x2, y2, cid in rects:
+                        cx = ((x1 + x2) / 2) / w
+                        cy = ((y1 + y2) / 2) / h
+                        bw = (x2 - x1) / w
+                        bh = (y2 - y1) / h
+                        anns.append({"class_id": int(cid), "bbox_xyxy": [x1, y1, x2, y2], "bbox_yolo": [cx, cy, bw, bh]})
+                    item = {
+                        "image": os.path.basename(img),
+                        "split": split,
+                        "width": w,
+                        "height": h,
+                        "annotations": anns,
+                    }
+                    f = split_files.get(split)
+                    if f is None:
+                        f = open(f"{out_dir}/annotations/{split}.json", "wb")
+                        split_files[split] = f
+                        f.write(b"[\n")
+                    else:
+                        f.write(b",\n")
+                    f.write(orjson.dumps(item, option=orjson.OPT_INDENT_2))
+            finally:
+                for f in split_files.values():
+                    f.write(b"\n]")
+                    f.close()
+            for fut in copies:
+                fut.result()
 
     return {"ok": True, "count": len(entries), "output": out_dir}
 
@@ -597,4 +881,17 @@ def export_all(req: ExportReq) -> dict[str, Any]:
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run("app:app", host="127.0.0.1", port=8000, reload=True)
+    # loop/http "auto" picks uvloop + httptools where installed (the
+    # uvicorn[standard] extras) and falls back cleanly on Windows.
+    # Reload is opt-in via DEV=1 so a plain run doesn't pay the file
+    # watcher and re-import cost. Keep WORKERS=1 unless project state
+    # moves out of the process.
+    uvicorn.run(
+        "app:app",
+        host="127.0.0.1",
+        port=8000,
+        loop="auto",
+        http="auto",
+        reload=os.environ.get("DEV", "0") == "1",
+        workers=int(os.environ.get("WORKERS", "1")),
+    )
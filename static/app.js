@@ -28,6 +28,14 @@ function setStatus(msg) {
   $("statusTop").textContent = `${state.idx + 1}/${state.images.length}`;
 }
 
+function imageUrl(p) {
+  if (state.root && p.startsWith(state.root + "/")) {
+    const rel = p.slice(state.root.length + 1);
+    return `/project_images/${rel.split("/").map(encodeURIComponent).join("/")}`;
+  }
+  return `/api/image?path=${encodeURIComponent(p)}`;
+}
+
 async function api(path, method = "GET", body = null) {
   const res = await fetch(path, {
     method,
@@ -275,7 +283,7 @@ async function loadCurrent() {
   $("imageSel").value = String(state.idx);
 
   const img = new Image();
-  img.src = `/api/image?path=${encodeURIComponent(p)}`;
+  img.src = imageUrl(p);
   await img.decode();
   state.img = img;
 
@@ -377,7 +385,8 @@ async function removeCurrentImage() {
   await saveCurrent();
   const p = state.images[state.idx];
   const data = await api("/api/remove", "POST", { image_path: p, split: state.split });
-  state.images = data.images;
+  const removedSet = new Set(data.removed_paths || []);
+  state.images = state.images.filter((x) => !removedSet.has(x));
   if (state.idx >= state.images.length) state.idx = Math.max(0, state.images.length - 1);
   refreshImageDropdown();
   await refreshRestoreList();
@@ -389,7 +398,10 @@ async function restoreImage() {
   const filename = $("restoreSel").value || "";
   if (!filename) return setStatus("Select a removed filename first");
   const data = await api("/api/restore", "POST", { split: state.split, filename });
-  state.images = data.images;
+  for (const p of data.added_paths || []) {
+    if (!state.images.includes(p)) state.images.push(p);
+  }
+  state.images.sort();
   refreshImageDropdown();
   await refreshRestoreList();
   await loadCurrent();